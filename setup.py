@@ -20,6 +20,9 @@ This package contains two C++ extension modules built with pybind11:
 - specrl.suffix_cache: For suffix tree based cache management
 """
 
+import concurrent.futures
+import functools
+import hashlib
 import os
 import re
 import shutil
@@ -31,6 +34,17 @@ from pathlib import Path
 from setuptools import Extension, setup, find_packages
 from setuptools.command.build_ext import build_ext
 
+# Parallelize any plain (non-CMake) extension compiles setuptools may run.
+# Everything currently goes through CMake, so this is a no-op safety net.
+# SPECRL_BUILD_JOBS sets the job count; 0 or unset means all cores here, while
+# the CMake build maps values <= 0 to its capped default (see build_cmake_project).
+try:
+    from pybind11.setup_helpers import ParallelCompile
+
+    ParallelCompile("SPECRL_BUILD_JOBS", default=0).install()
+except ImportError:
+    pass
+
 # Convert distutils Windows platform specifiers to CMake -A arguments
 PLAT_TO_CMAKE = {
     "win32": "Win32",
@@ -39,21 +53,44 @@ PLAT_TO_CMAKE = {
     "win-arm64": "ARM64",
 }
 
+# setup.py commands that actually compile the extensions. Anything else
+# (egg_info, dist_info, --name, --version, ...) only needs package metadata.
+BUILD_COMMANDS = {"build", "build_ext", "bdist_wheel", "install", "develop", "editable_wheel"}
+
+
+def is_build_command(argv=None) -> bool:
+    """Return True if the setup.py invocation will build the C++ extensions."""
+    argv = sys.argv[1:] if argv is None else argv
+    return any(arg in BUILD_COMMANDS for arg in argv)
+
+
+@functools.lru_cache(maxsize=None)
+def _which(name: str):
+    """Memoized shutil.which; PATH lookups are repeated across build steps."""
+    return shutil.which(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _cmake_version() -> str:
+    """Return the version of the cmake on PATH, probed once per setup.py run."""
+    result = subprocess.run(["cmake", "--version"], capture_output=True, text=True)
+    return result.stdout.split()[2] if result.returncode == 0 else "unknown"
+
 
 def check_system_dependencies():
     """Check if required system dependencies are available."""
     missing_deps = []
     
     # Check for protoc
-    if not shutil.which("protoc"):
+    if not _which("protoc"):
         missing_deps.append("protobuf-compiler")
     
     # Check for grpc_cpp_plugin
-    if not shutil.which("grpc_cpp_plugin"):
+    if not _which("grpc_cpp_plugin"):
         missing_deps.append("protobuf-compiler-grpc")
     
     # Check for pkg-config
-    if not shutil.which("pkg-config"):
+    if not _which("pkg-config"):
         missing_deps.append("pkg-config")
     
     if missing_deps:
@@ -79,25 +116,35 @@ def check_system_dependencies():
 
 
 class CMakeExtension(Extension):
-    """A CMake-based extension module."""
+    """A CMake-based extension module.
+
+    ``target`` names the CMake target producing the module. Extensions that
+    share a ``sourcedir`` are configured and built together in one CMake tree.
+    """
 
-    def __init__(self, name: str, sourcedir: str = "") -> None:
+    def __init__(self, name: str, sourcedir: str = "", target: str = "") -> None:
         super().__init__(name, sources=[])
         self.sourcedir = os.fspath(Path(sourcedir).resolve())
+        self.target = target
 
 
-# Flag to track if protobuf files have been generated
-_protobuf_generated = False
+def read_protoc_dependencies(deps_file: Path) -> list:
+    """Return the input .proto paths listed in a protoc --dependency_out file.
+
+    protoc writes one path per line joined by backslash-newline and does not
+    escape spaces, so entries are split on the continuations, not whitespace.
+    """
+    entries = [entry.strip() for entry in re.split(r"\\\r?\n", deps_file.read_text())]
+    # "<outputs>: <inputs>"; split on ": " so Windows drive letters survive
+    for i, entry in enumerate(entries):
+        if ": " in entry:
+            first_input = entry.split(": ", 1)[1]
+            return [Path(dep) for dep in [first_input] + entries[i + 1:] if dep]
+    return []
 
 
 def generate_protobuf_files(root_dir: Path) -> None:
     """Generate C++ files from shared .proto file using protoc and grpc_cpp_plugin."""
-    global _protobuf_generated
-    
-    # Only generate once
-    if _protobuf_generated:
-        return
-    
     proto_dir = root_dir / "proto"
     proto_file = proto_dir / "rollout-cache.proto"
     
@@ -105,22 +152,37 @@ def generate_protobuf_files(root_dir: Path) -> None:
         print(f"Warning: {proto_file} not found, skipping protobuf generation")
         return
 
-    # Check if generated files already exist and are newer than proto file
+    # Check if generated files already exist and were produced from the same
+    # proto contents. Comparing a content hash (rather than mtimes) keeps a
+    # plain `touch` or a fresh checkout from regenerating the stubs and
+    # invalidating every translation unit that includes them.
     pb_cc = proto_dir / "rollout-cache.pb.cc"
     grpc_pb_cc = proto_dir / "rollout-cache.grpc.pb.cc"
-    
-    if pb_cc.exists() and grpc_pb_cc.exists():
-        proto_mtime = proto_file.stat().st_mtime
-        if pb_cc.stat().st_mtime > proto_mtime and grpc_pb_cc.stat().st_mtime > proto_mtime:
-            print(f"Protobuf files in {proto_dir} are up to date")
-            _protobuf_generated = True
-            return
+    hash_file = proto_dir / ".rollout-cache.proto.sha256"
+    # Make-style list of every .proto the generated code depends on (imports
+    # included), written by protoc --dependency_out
+    deps_file = proto_dir / ".rollout-cache.d"
+    proto_hash = hashlib.sha256(proto_file.read_bytes()).hexdigest()
+
+    if pb_cc.exists() and grpc_pb_cc.exists() and hash_file.exists() and deps_file.exists():
+        if hash_file.read_text().strip() == proto_hash:
+            # The main proto is covered by the hash; imported protos by mtime
+            generated_mtime = min(pb_cc.stat().st_mtime, grpc_pb_cc.stat().st_mtime)
+            imports = [dep for dep in read_protoc_dependencies(deps_file) if dep != proto_file]
+            # Entries we cannot find are unknown rather than stale; regenerating
+            # on them would rewrite the stubs (and recompile everything) every run
+            for dep in imports:
+                if not dep.exists():
+                    print(f"Note: ignoring unknown protobuf dependency {dep}")
+            if all(dep.stat().st_mtime <= generated_mtime for dep in imports if dep.exists()):
+                print(f"Protobuf files in {proto_dir} are up to date")
+                return
 
     print(f"Generating protobuf files in {proto_dir}...")
     sys.stdout.flush()
 
     # Find grpc_cpp_plugin
-    grpc_plugin = shutil.which("grpc_cpp_plugin")
+    grpc_plugin = _which("grpc_cpp_plugin")
     if not grpc_plugin:
         # Try common locations
         for path in ["/usr/bin/grpc_cpp_plugin", "/usr/local/bin/grpc_cpp_plugin"]:
@@ -134,18 +196,16 @@ def generate_protobuf_files(root_dir: Path) -> None:
             "sudo apt install -y protobuf-compiler-grpc"
         )
 
-    print(f"  Running protoc for C++ files...")
-    sys.stdout.flush()
-    # Generate protobuf C++ files
-    subprocess.run(
-        ["protoc", f"--cpp_out={proto_dir}", f"--proto_path={proto_dir}", str(proto_file)],
-        check=True
-    )
-
-    print(f"  Running protoc for gRPC files...")
-    sys.stdout.flush()
-    # Generate gRPC C++ files
-    subprocess.run(
+    protoc_cmds = [
+        # Generate protobuf C++ files
+        [
+            "protoc",
+            f"--cpp_out={proto_dir}",
+            f"--proto_path={proto_dir}",
+            f"--dependency_out={deps_file}",
+            str(proto_file)
+        ],
+        # Generate gRPC C++ files
         [
             "protoc",
             f"--grpc_out={proto_dir}",
@@ -153,11 +213,127 @@ def generate_protobuf_files(root_dir: Path) -> None:
             f"--plugin=protoc-gen-grpc={grpc_plugin}",
             str(proto_file)
         ],
-        check=True
-    )
+    ]
+
+    print(f"  Running protoc for C++ and gRPC files...")
+    sys.stdout.flush()
+    # The two protoc invocations write disjoint outputs, so run them concurrently
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(protoc_cmds)) as executor:
+        futures = [executor.submit(subprocess.run, cmd, check=True) for cmd in protoc_cmds]
+        for future in futures:
+            future.result()
+
+    # Only record the hash once both generators have succeeded
+    hash_file.write_text(proto_hash + "\n")
     print(f"Successfully generated protobuf files in {proto_dir}")
     sys.stdout.flush()
-    _protobuf_generated = True
+
+
+def _ninja_executable():
+    """Return the ninja binary from the ninja wheel or PATH, or None."""
+    try:
+        import ninja
+        return os.fspath(Path(ninja.BIN_DIR) / "ninja")
+    except ImportError:
+        return _which("ninja")
+
+
+def link_compile_commands(source_root: Path, build_dir: Path) -> None:
+    """Symlink build_dir/compile_commands.json into source_root for editors/clangd."""
+    database = build_dir / "compile_commands.json"
+    link = source_root / "compile_commands.json"
+    # Never replace a real file the developer put there
+    if not database.exists() or (link.exists() and not link.is_symlink()):
+        return
+    try:
+        if link.is_symlink():
+            if Path(os.readlink(link)) == database:
+                return
+            link.unlink()
+        link.symlink_to(database)
+    except OSError as e:
+        # e.g. Windows without symlink privileges
+        print(f"Note: could not link {link} -> {database}: {e}")
+
+
+# Records the arguments a persistent CMake build tree was configured with
+CMAKE_ARGS_FILE = ".specrl-cmake-args"
+
+
+def reset_cmake_cache_on_generator_change(build_dir: Path, generator) -> None:
+    """Drop CMakeCache.txt and CMakeFiles/ if build_dir used another generator.
+
+    ``generator`` is the generator about to be used, or None for CMake's
+    platform default (Unix Makefiles, or a Visual Studio generator on Windows).
+    """
+    cache_file = build_dir / "CMakeCache.txt"
+    if not cache_file.exists():
+        return
+    cached = None
+    for line in cache_file.read_text().splitlines():
+        if line.startswith("CMAKE_GENERATOR:INTERNAL="):
+            cached = line.split("=", 1)[1]
+            break
+    if cached is None:
+        return
+
+    if generator is not None:
+        matches = cached == generator
+    elif platform.system() == "Windows":
+        matches = cached.startswith("Visual Studio")
+    else:
+        matches = cached == "Unix Makefiles"
+    if matches:
+        return
+
+    print(f"CMake generator changed ({cached} -> {generator or 'default'}), "
+          f"resetting {cache_file}")
+    cache_file.unlink()
+    shutil.rmtree(build_dir / "CMakeFiles", ignore_errors=True)
+
+
+# CMake arguments that point into pip's throwaway build environment
+# (/tmp/pip-build-env-*) and so change on every isolated build, mapped to the
+# cache entry they set. They are left out of the comparison; instead the paths
+# cached by the previous configure must still exist.
+VOLATILE_CMAKE_ARGS = {
+    "-Dpybind11_DIR": "pybind11_DIR",
+    "-DCMAKE_MAKE_PROGRAM:FILEPATH": "CMAKE_MAKE_PROGRAM",
+}
+
+
+def stable_cmake_args(cmake_args: list) -> list:
+    """Return cmake_args without the VOLATILE_CMAKE_ARGS entries."""
+    return [arg for arg in cmake_args if arg.split("=", 1)[0] not in VOLATILE_CMAKE_ARGS]
+
+
+def is_cmake_configured(build_dir: Path, sourcedir: str, cmake_args: list) -> bool:
+    """Return True if build_dir was configured from sourcedir with cmake_args."""
+    cache_file = build_dir / "CMakeCache.txt"
+    args_file = build_dir / CMAKE_ARGS_FILE
+    if not cache_file.exists() or not args_file.exists():
+        return False
+    if not any((build_dir / name).exists() for name in ("build.ninja", "Makefile")):
+        return False
+    if args_file.read_text() != "\n".join(stable_cmake_args(cmake_args)):
+        return False
+
+    cache = {}
+    for line in cache_file.read_text().splitlines():
+        entry, sep, value = line.partition("=")
+        if sep and not line.startswith(("#", "//")):
+            cache[entry.split(":", 1)[0]] = value
+
+    # A previous isolated build may have cached tools from a since-deleted env
+    for cache_name in VOLATILE_CMAKE_ARGS.values():
+        if cache.get(cache_name) and not os.path.exists(cache[cache_name]):
+            return False
+
+    # Detect a moved or different source tree
+    home_dir = cache.get("CMAKE_HOME_DIRECTORY")
+    if home_dir is None:
+        return False
+    return os.path.normcase(os.path.normpath(home_dir)) == os.path.normcase(sourcedir)
 
 
 class CMakeBuild(build_ext):
@@ -172,22 +348,38 @@ class CMakeBuild(build_ext):
             print(f"  Extension: {ext.name}")
         print(f"{'='*70}\n")
         sys.stdout.flush()
+
+        # Generate protobuf files once, before any extension is configured.
+        # ext.sourcedir is the repository root holding the top-level CMakeLists.txt
+        # proto directory is at /path/to/specrl/proto (sibling of cache_updater/suffix_cache)
+        if self.extensions:
+            root_dir = Path(self.extensions[0].sourcedir) / "specrl"  # Gets us to /path/to/specrl
+            print(f"DEBUG: root_dir = {root_dir}")
+            print(f"DEBUG: proto_dir = {root_dir / 'proto'}")
+            sys.stdout.flush()
+            generate_protobuf_files(root_dir)
+
         super().run()
 
+    def build_extensions(self) -> None:
+        # Extensions sharing a CMake source tree are configured once and built
+        # by a single CMake invocation instead of once per extension.
+        self.check_extensions_list(self.extensions)
+        projects = {}
+        for ext in self.extensions:
+            projects.setdefault(ext.sourcedir, []).append(ext)
+        for sourcedir, exts in projects.items():
+            self.build_cmake_project(sourcedir, exts)
+
     def build_extension(self, ext: CMakeExtension) -> None:
-        # Generate protobuf files before building
-        # ext.sourcedir is like /path/to/specrl/cache_updater or /path/to/specrl/suffix_cache
-        # proto directory is at /path/to/specrl/proto (sibling of cache_updater/suffix_cache)
-        root_dir = Path(ext.sourcedir).parent  # Gets us to /path/to/specrl
-        print(f"DEBUG: ext.sourcedir = {ext.sourcedir}")
-        print(f"DEBUG: root_dir = {root_dir}")
-        print(f"DEBUG: proto_dir = {root_dir / 'proto'}")
+        self.build_cmake_project(ext.sourcedir, [ext])
+
+    def build_cmake_project(self, sourcedir: str, exts: list) -> None:
+        print(f"DEBUG: sourcedir = {sourcedir}")
         sys.stdout.flush()
-        generate_protobuf_files(root_dir)
 
-        # Must be in this form due to bug in .resolve() only fixed in Python 3.10+
-        ext_fullpath = Path.cwd() / self.get_ext_fullpath(ext.name)
-        extdir = ext_fullpath.parent.resolve()
+        # CMakeExtension.sourcedir is already resolved; build the Path once
+        source_root = Path(sourcedir)
 
         debug = int(os.environ.get("DEBUG", 0)) if self.debug is None else self.debug
         cfg = "Debug" if debug else "Release"
@@ -203,9 +395,10 @@ class CMakeBuild(build_ext):
             pybind11_cmake_dir = None
 
         cmake_args = [
-            f"-DCMAKE_LIBRARY_OUTPUT_DIRECTORY={extdir}{os.sep}",
             f"-DPYTHON_EXECUTABLE={sys.executable}",
             f"-DCMAKE_BUILD_TYPE={cfg}",
+            # compile_commands.json for editors/clangd and ccache path normalization
+            "-DCMAKE_EXPORT_COMPILE_COMMANDS=ON",
         ]
 
         if pybind11_cmake_dir:
@@ -214,8 +407,31 @@ class CMakeBuild(build_ext):
         # Platform-specific optimizations - controlled by ENABLE_AGGRESSIVE_OPTS env var
         # Don't override CMakeLists.txt settings here, let CMake handle it based on the env var
         # The optimization flags are set in the CMakeLists.txt files
+        # Always pass ON/OFF: option() values persist in the reused CMakeCache.txt,
+        # so an omitted flag would silently keep a previous build's setting
+        for opt in ("SPECRL_ENABLE_NATIVE_OPT", "SPECRL_ENABLE_AVX2", "SPECRL_ENABLE_FAST_MATH"):
+            enabled = os.environ.get(opt, "0") == "1"
+            cmake_args.append(f"-D{opt}={'ON' if enabled else 'OFF'}")
 
         build_args = []
+        build_env = os.environ.copy()
+
+        # Use ccache/sccache as compiler launcher when available so unchanged
+        # translation units are not recompiled on clean builds.
+        # Set SPECRL_DISABLE_CCACHE=1 to opt out. The launcher is always passed
+        # (empty when unused) so a value cached in the persistent build tree
+        # is cleared when ccache is disabled or uninstalled.
+        launcher = ""
+        if os.environ.get("SPECRL_DISABLE_CCACHE", "0") != "1":
+            launcher = _which("ccache") or _which("sccache") or ""
+        if launcher:
+            print(f"Using compiler launcher: {launcher}")
+            # Hash the compiler binary rather than trusting its path/mtime
+            build_env.setdefault("CCACHE_COMPILERCHECK", "content")
+        cmake_args += [
+            f"-DCMAKE_C_COMPILER_LAUNCHER={launcher}",
+            f"-DCMAKE_CXX_COMPILER_LAUNCHER={launcher}",
+        ]
 
         # Adding CMake arguments set as environment variable
         if "CMAKE_ARGS" in os.environ:
@@ -223,105 +439,166 @@ class CMakeBuild(build_ext):
 
         cmake_args += [f"-DEXAMPLE_VERSION_INFO={self.distribution.get_version()}"]
 
+        # Ninja is the default generator: its restat and dependency scanning make
+        # incremental rebuilds much faster than Makefiles or MSBuild
+        ninja_executable_path = _ninja_executable()
+
         if self.compiler.compiler_type != "msvc":
             if not cmake_generator or cmake_generator == "Ninja":
-                try:
-                    import ninja
-                    ninja_executable_path = Path(ninja.BIN_DIR) / "ninja"
+                if ninja_executable_path:
+                    cmake_generator = "Ninja"
                     cmake_args += [
                         "-GNinja",
                         f"-DCMAKE_MAKE_PROGRAM:FILEPATH={ninja_executable_path}",
                     ]
-                except ImportError:
-                    pass
+                elif cmake_generator:
+                    raise RuntimeError(
+                        "CMAKE_GENERATOR=Ninja but ninja was not found. "
+                        "Please install it: pip install ninja"
+                    )
+                else:
+                    print("WARNING: ninja not found, falling back to CMake's default generator "
+                          "(pip install ninja for faster incremental builds)")
         else:
-            single_config = any(x in cmake_generator for x in {"NMake", "Ninja"})
+            # Ninja only works with MSVC from a developer prompt (cl.exe on PATH)
+            if not cmake_generator and ninja_executable_path and _which("cl"):
+                cmake_generator = "Ninja Multi-Config"
+                cmake_args += [
+                    f"-G{cmake_generator}",
+                    f"-DCMAKE_MAKE_PROGRAM:FILEPATH={ninja_executable_path}",
+                ]
+
+            single_config = "NMake" in cmake_generator or cmake_generator == "Ninja"
             contains_arch = any(x in cmake_generator for x in {"ARM", "Win64"})
 
-            if not single_config and not contains_arch:
+            # -A is only understood by the Visual Studio generators
+            if not single_config and not contains_arch and "Ninja" not in cmake_generator:
                 cmake_args += ["-A", PLAT_TO_CMAKE[self.plat_name]]
 
             if not single_config:
-                cmake_args += [f"-DCMAKE_LIBRARY_OUTPUT_DIRECTORY_{cfg.upper()}={extdir}"]
                 build_args += ["--config", cfg]
 
+        # Give the modules a relocatable RPATH ($ORIGIN / @loader_path) that stays
+        # valid after setuptools copies them into the wheel/install tree.
+        # USE_LINK_PATH keeps the directories of dependencies linked by full path
+        # (e.g. Boost/Protobuf from conda or /opt), which the install RPATH would
+        # otherwise replace, breaking the import.
+        rpath_args = ["-DCMAKE_BUILD_WITH_INSTALL_RPATH=ON", "-DCMAKE_INSTALL_RPATH_USE_LINK_PATH=ON"]
+        if sys.platform.startswith("linux"):
+            cmake_args += ["-DCMAKE_INSTALL_RPATH=$ORIGIN"] + rpath_args
+        elif sys.platform.startswith("darwin"):
+            cmake_args += ["-DCMAKE_INSTALL_RPATH=@loader_path"] + rpath_args
+
         if sys.platform.startswith("darwin"):
             # Cross-compile support for macOS - respect ARCHFLAGS if set
             archs = re.findall(r"-arch (\S+)", os.environ.get("ARCHFLAGS", ""))
             if archs:
                 cmake_args += ["-DCMAKE_OSX_ARCHITECTURES={}".format(";".join(archs))]
 
-        # Set CMAKE_BUILD_PARALLEL_LEVEL to control the parallel build level
-        if "CMAKE_BUILD_PARALLEL_LEVEL" not in os.environ:
-            if hasattr(self, "parallel") and self.parallel:
-                build_args += [f"-j{self.parallel}"]
-
-        build_temp = Path(self.build_temp) / ext.name
-        if not build_temp.exists():
-            build_temp.mkdir(parents=True)
-
+        # Set CMAKE_BUILD_PARALLEL_LEVEL to control the parallel build level.
+        # Otherwise always pass an explicit job count: setuptools' self.parallel
+        # is usually unset under pip, which leaves the Make generator serial.
+        # SPECRL_BUILD_JOBS overrides the default (capped at 8 to avoid OOM);
+        # values <= 0 mean "use the default". SPECRL_PARALLEL_BUILD=OFF forces
+        # a serial build.
+        if "CMAKE_BUILD_PARALLEL_LEVEL" not in os.environ and not any(
+            arg == "--parallel" or arg.startswith("-j") for arg in build_args
+        ):
+            default_jobs = min(os.cpu_count() or 2, 8)
+            if os.environ.get("SPECRL_PARALLEL_BUILD", "ON").upper() in ("OFF", "0", "FALSE"):
+                jobs = 1
+            elif "SPECRL_BUILD_JOBS" in os.environ:
+                try:
+                    jobs = int(os.environ["SPECRL_BUILD_JOBS"])
+                except ValueError:
+                    print(f"WARNING: invalid SPECRL_BUILD_JOBS={os.environ['SPECRL_BUILD_JOBS']!r}, "
+                          f"using {default_jobs} jobs")
+                    jobs = default_jobs
+                if jobs <= 0:
+                    jobs = default_jobs
+            elif hasattr(self, "parallel") and self.parallel:
+                jobs = self.parallel
+            else:
+                jobs = default_jobs
+            build_args += ["--parallel", str(jobs)]
+
+        # Keep the CMake build tree in a stable location (<repo>/build/cmake)
+        # instead of setuptools' build_temp, which is recreated on every
+        # `pip install`. This lets CMakeCache.txt, Ninja's .ninja_deps and the
+        # object files survive between invocations so rebuilds are incremental.
+        build_temp = source_root / "build" / "cmake"
+        build_temp.mkdir(parents=True, exist_ok=True)
+
+        ext_names = ", ".join(ext.name for ext in exts)
         print(f"\n{'='*70}")
-        print(f"Building extension: {ext.name}")
-        print(f"Source directory: {ext.sourcedir}")
+        print(f"Building extensions: {ext_names}")
+        print(f"Source directory: {sourcedir}")
         print(f"Build directory: {build_temp}")
         print(f"{'='*70}")
-        print(f"\nConfiguring with CMake...")
         sys.stdout.flush()
 
-        # Check which cmake is being used
-        cmake_path = shutil.which("cmake")
-        print(f"Using cmake: {cmake_path}")
-        cmake_version_result = subprocess.run(
-            ["cmake", "--version"],
-            capture_output=True,
-            text=True
-        )
-        print(f"CMake version: {cmake_version_result.stdout.split()[2] if cmake_version_result.returncode == 0 else 'unknown'}")
-        sys.stdout.flush()
+        # Skip the configure step when the persistent build tree was already
+        # configured from this source dir with identical (stable) arguments.
+        # `cmake --build` still re-runs CMake by itself if any CMakeLists.txt changed.
+        # Set SPECRL_FORCE_RECONFIGURE=1 to always configure.
+        args_file = build_temp / CMAKE_ARGS_FILE
+        # The generator can differ between runs (e.g. ninja only present in an
+        # isolated build env); CMake refuses to switch generators in place
+        reset_cmake_cache_on_generator_change(build_temp, cmake_generator or None)
+        force_reconfigure = os.environ.get("SPECRL_FORCE_RECONFIGURE", "0") == "1"
+        if not force_reconfigure and is_cmake_configured(build_temp, sourcedir, cmake_args):
+            print(f"\nCMake build tree is up to date, skipping configure")
+        else:
+            print(f"\nConfiguring with CMake...")
+            sys.stdout.flush()
+
+            # Check which cmake is being used
+            cmake_path = _which("cmake")
+            print(f"Using cmake: {cmake_path}")
+            print(f"CMake version: {_cmake_version()}")
+            sys.stdout.flush()
+
+            # Bound the configure step with a subprocess timeout instead of SIGALRM,
+            # which is unavailable on Windows and only works from the main thread.
+            # First-time configures (protobuf/gRPC discovery) can be slow, hence the
+            # generous default; override with SPECRL_CMAKE_TIMEOUT (seconds).
+            timeout = 600
+            if "SPECRL_CMAKE_TIMEOUT" in os.environ:
+                try:
+                    timeout = int(os.environ["SPECRL_CMAKE_TIMEOUT"])
+                except ValueError:
+                    timeout = 0
+                if timeout <= 0:
+                    print(f"WARNING: invalid SPECRL_CMAKE_TIMEOUT="
+                          f"{os.environ['SPECRL_CMAKE_TIMEOUT']!r}, using 600 seconds")
+                    timeout = 600
+            cmake_cmd = ["cmake", sourcedir] + cmake_args
+
+            # Forget the recorded arguments until this configure succeeds
+            if args_file.exists():
+                args_file.unlink()
+
+            # Let CMake write straight to our stdout/stderr instead of piping it
+            # through Python line by line; subprocess.run kills it on timeout.
+            try:
+                subprocess.run(cmake_cmd, cwd=build_temp, env=build_env, check=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                print(f"\nCMake configuration timed out after {timeout} seconds")
+                raise
+
+            args_file.write_text("\n".join(stable_cmake_args(cmake_args)))
+            print(f"\n✓ CMake configure completed")
+
+        # Both modules live in one tree, so a single database covers every TU
+        link_compile_commands(source_root, build_temp)
 
-        # Run cmake with unbuffered output
-        import signal
-        
-        def timeout_handler(signum, frame):
-            raise TimeoutError("CMake configuration timed out after 30 seconds")
-        
-        # Set a 30-second timeout for testing
-        old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(30)
-        
-        try:
-            # Run cmake without capturing output to avoid deadlock
-            # CMake changes behavior when stdout is a pipe
-            cmake_cmd = ["cmake", ext.sourcedir] + cmake_args
-            
-            proc = subprocess.Popen(
-                cmake_cmd,
-                cwd=build_temp,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1  # Line buffered
-            )
-            
-            # Read and print output line by line
-            for line in proc.stdout:
-                print(line, end='')
-                sys.stdout.flush()
-            
-            proc.wait()
-            if proc.returncode != 0:
-                raise subprocess.CalledProcessError(proc.returncode, "cmake")
-        finally:
-            signal.alarm(0)  # Cancel the alarm
-            signal.signal(signal.SIGALRM, old_handler)
-        
-        print(f"\n✓ CMake configure completed")
         print(f"\nCompiling C++ code...\n")
         sys.stdout.flush()
         
         proc = subprocess.Popen(
             ["cmake", "--build", "."] + build_args,
             cwd=build_temp,
+            env=build_env,
             stdout=None,
             stderr=None
         )
@@ -329,7 +606,20 @@ class CMakeBuild(build_ext):
         if proc.returncode != 0:
             raise subprocess.CalledProcessError(proc.returncode, "cmake --build")
         
-        print(f"\n✓ Successfully built {ext.name}")
+        # CMake writes each module to build/cmake/lib/<target>/; copy them to
+        # where setuptools expects them. Keeping the output location fixed means
+        # a new (temporary) build_lib neither reconfigures nor relinks anything.
+        cwd = Path.cwd()
+        for ext in exts:
+            ext_fullpath = cwd / self.get_ext_fullpath(ext.name)
+            built = build_temp / "lib" / ext.target / ext_fullpath.name
+            if not built.exists():
+                raise RuntimeError(f"CMake target {ext.target} did not produce {built}")
+            ext_fullpath.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(built, ext_fullpath)
+            print(f"Copied {built} -> {ext_fullpath}")
+
+        print(f"\n✓ Successfully built {ext_names}")
         print(f"{'='*70}\n")
         sys.stdout.flush()
 
@@ -341,8 +631,10 @@ def get_version():
 
 
 if __name__ == "__main__":
-    # Check system dependencies before building
-    check_system_dependencies()
+    # Check system dependencies before building; metadata-only invocations
+    # don't need the C++ toolchain
+    if is_build_command():
+        check_system_dependencies()
     
     # Get the root directory
     ROOT_DIR = Path(__file__).parent.resolve()
@@ -362,9 +654,10 @@ if __name__ == "__main__":
             "specrl_fix.cache_updater": "specrl/cache_updater",
             "specrl_fix.suffix_cache": "specrl/suffix_cache",
         },
+        # Both modules are built from the top-level CMakeLists.txt in one CMake tree
         ext_modules=[
-            CMakeExtension("specrl_fix.cache_updater._C", str(ROOT_DIR / "specrl" / "cache_updater")),
-            CMakeExtension("specrl_fix.suffix_cache._C", str(ROOT_DIR / "specrl" / "suffix_cache")),
+            CMakeExtension("specrl_fix.cache_updater._C", str(ROOT_DIR), target="cache_updater_C"),
+            CMakeExtension("specrl_fix.suffix_cache._C", str(ROOT_DIR), target="suffix_cache_C"),
         ],
         cmdclass={"build_ext": CMakeBuild},
         install_requires=[],
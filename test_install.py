@@ -23,105 +23,124 @@ Run this script after installation to check if all modules are working correctly
 import sys
 import subprocess
 import textwrap
+import threading
+import concurrent.futures
+
+# Tests run concurrently; serialize writes so lines never get mixed up
+_print_lock = threading.Lock()
+
+
+def _print(line):
+    with _print_lock:
+        print(line, flush=True)
 
 
 def run_test_in_subprocess(test_code, test_name):
-    """Run test code in a separate Python process to ensure isolation."""
-    print(f"Testing {test_name} module (in isolated process)...")
+    """Run test code in a separate Python process to ensure isolation.
+
+    The subprocess output is streamed as it is produced. Each line is tagged
+    with the test name because tests run concurrently.
+    """
+    _print(f"Testing {test_name} module (in isolated process)...")
     
     try:
-        result = subprocess.run(
-            [sys.executable, "-c", test_code],
-            capture_output=True,
-            text=True,
-            timeout=10
+        # -u: unbuffered child stdout, otherwise nothing arrives until it exits
+        proc = subprocess.Popen(
+            [sys.executable, "-u", "-c", test_code],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=1,
+            text=True
         )
-        
-        # Print the output from subprocess
-        if result.stdout:
-            for line in result.stdout.strip().split('\n'):
-                print(f"  {line}")
-        
-        # Check if test passed
-        if result.returncode == 0:
-            return True
-        else:
-            if result.stderr:
-                print(f"  ✗ Error output:")
-                for line in result.stderr.strip().split('\n'):
-                    print(f"    {line}")
-            return False
-            
+    except Exception as e:
+        _print(f"  ✗ Error running subprocess: {e}")
+        return False
+
+    def forward_output():
+        for line in proc.stdout:
+            _print(f"  [{test_name}] {line.rstrip()}")
+
+    # Read in a thread so the timeout still applies while output is streaming
+    reader = threading.Thread(target=forward_output, daemon=True)
+    reader.start()
+    try:
+        proc.wait(timeout=10)
     except subprocess.TimeoutExpired:
-        print(f"  ✗ Test timed out")
+        proc.kill()
+        proc.wait()
+        _print(f"  [{test_name}] ✗ Test timed out")
         return False
+    finally:
+        reader.join()
+
+    # Check if test passed
+    return proc.returncode == 0
+
+
+# Test programs run in the isolated subprocesses, dedented once at import
+_CACHE_UPDATER_CODE = textwrap.dedent("""
+    import sys
+    try:
+        from specrl_fix.cache_updater import SuffixCacheUpdater
+        print("✓ SuffixCacheUpdater imported successfully")
+        
+        # Test instantiation (without server connection)
+        updater = SuffixCacheUpdater()
+        print("✓ SuffixCacheUpdater() created successfully")
+        
+        # Test with server addresses
+        updater_with_addr = SuffixCacheUpdater(["localhost:50051"])
+        print("✓ SuffixCacheUpdater(['localhost:50051']) created successfully")
+        
+        sys.exit(0)
     except Exception as e:
-        print(f"  ✗ Error running subprocess: {e}")
-        return False
+        print(f"✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+""")
+
+_SUFFIX_CACHE_CODE = textwrap.dedent("""
+    import sys
+    try:
+        from specrl_fix.suffix_cache import SuffixCache, SuffixSpecResult, RolloutCacheServer
+        print("✓ SuffixCache imported successfully")
+        print("✓ SuffixSpecResult imported successfully")
+        print("✓ RolloutCacheServer imported successfully")
+        
+        # Test SuffixCache instantiation
+        cache = SuffixCache()
+        print("✓ SuffixCache() created successfully")
+        
+        # Test SuffixSpecResult instantiation
+        result = SuffixSpecResult()
+        print("✓ SuffixSpecResult() created successfully")
+        
+        # Check SuffixSpecResult attributes
+        assert hasattr(result, 'token_ids'), "Missing token_ids attribute"
+        assert hasattr(result, 'parents'), "Missing parents attribute"
+        assert hasattr(result, 'probs'), "Missing probs attribute"
+        assert hasattr(result, 'score'), "Missing score attribute"
+        assert hasattr(result, 'match_len'), "Missing match_len attribute"
+        print("✓ SuffixSpecResult attributes verified")
+        
+        sys.exit(0)
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+""")
 
 
 def test_cache_updater():
     """Test cache_updater module import and basic functionality."""
-    test_code = textwrap.dedent("""
-        import sys
-        try:
-            from specrl_fix.cache_updater import SuffixCacheUpdater
-            print("✓ SuffixCacheUpdater imported successfully")
-            
-            # Test instantiation (without server connection)
-            updater = SuffixCacheUpdater()
-            print("✓ SuffixCacheUpdater() created successfully")
-            
-            # Test with server addresses
-            updater_with_addr = SuffixCacheUpdater(["localhost:50051"])
-            print("✓ SuffixCacheUpdater(['localhost:50051']) created successfully")
-            
-            sys.exit(0)
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            import traceback
-            traceback.print_exc()
-            sys.exit(1)
-    """)
-    
-    return run_test_in_subprocess(test_code, "specrl_fix.cache_updater")
+    return run_test_in_subprocess(_CACHE_UPDATER_CODE, "specrl_fix.cache_updater")
 
 
 def test_suffix_cache():
     """Test suffix_cache module import and basic functionality."""
-    test_code = textwrap.dedent("""
-        import sys
-        try:
-            from specrl_fix.suffix_cache import SuffixCache, SuffixSpecResult, RolloutCacheServer
-            print("✓ SuffixCache imported successfully")
-            print("✓ SuffixSpecResult imported successfully")
-            print("✓ RolloutCacheServer imported successfully")
-            
-            # Test SuffixCache instantiation
-            cache = SuffixCache()
-            print("✓ SuffixCache() created successfully")
-            
-            # Test SuffixSpecResult instantiation
-            result = SuffixSpecResult()
-            print("✓ SuffixSpecResult() created successfully")
-            
-            # Check SuffixSpecResult attributes
-            assert hasattr(result, 'token_ids'), "Missing token_ids attribute"
-            assert hasattr(result, 'parents'), "Missing parents attribute"
-            assert hasattr(result, 'probs'), "Missing probs attribute"
-            assert hasattr(result, 'score'), "Missing score attribute"
-            assert hasattr(result, 'match_len'), "Missing match_len attribute"
-            print("✓ SuffixSpecResult attributes verified")
-            
-            sys.exit(0)
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            import traceback
-            traceback.print_exc()
-            sys.exit(1)
-    """)
-    
-    return run_test_in_subprocess(test_code, "specrl_fix.suffix_cache")
+    return run_test_in_subprocess(_SUFFIX_CACHE_CODE, "specrl_fix.suffix_cache")
 
 
 def main():
@@ -129,11 +148,15 @@ def main():
     print("specRL Installation Test")
     print("=" * 50)
     
-    results = []
-    
-    # Test each module
-    results.append(("specrl_fix.cache_updater", test_cache_updater()))
-    results.append(("specrl_fix.suffix_cache", test_suffix_cache()))
+    # Test each module; every test runs in its own subprocess, so they are
+    # independent and can run concurrently
+    tests = [
+        ("specrl_fix.cache_updater", test_cache_updater),
+        ("specrl_fix.suffix_cache", test_suffix_cache),
+    ]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        futures = {name: executor.submit(fn) for name, fn in tests}
+        results = [(name, future.result()) for name, future in futures.items()]
     
     # Summary
     print("\n" + "=" * 50)